@@ -10,6 +10,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import io
 import os
 
 # Configurações de página
@@ -52,16 +53,37 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.parquet')
+DAILY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'receita_diaria.parquet')
+
+# Máximo de pontos enviados ao navegador na série temporal
+MAX_PONTOS_SERIE = 2000
+
 @st.cache_data
-def carregar_dados():
-    """Carrega os dados processados."""
-    path = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.csv')
-    df = pd.read_csv(path, parse_dates=['data_venda'])
+def carregar_dados(mtime):
+    """Carrega os dados processados (mtime entra na chave do cache)."""
+    # Uma nova execução do ETL altera o mtime e invalida o cache sem reiniciar o app
+    df = pd.read_parquet(DATA_PATH, engine='pyarrow')
+    
+    # Ordenado por data, o filtro de período vira uma busca binária (ver criar_filtros)
+    df = df.sort_values('data_venda', kind='stable', ignore_index=True)
+    
+    # Categorias em ordem alfabética: os filtros usam cat.categories diretamente
+    for coluna in ['regiao', 'status', 'forma_pagamento']:
+        df[coluna] = df[coluna].cat.reorder_categories(sorted(df[coluna].cat.categories))
     return df
 
+@st.cache_data
+def carregar_receita_diaria(mtime):
+    """Carrega a receita diária pré-calculada pelo ETL (período completo, sem filtros)."""
+    return pd.read_parquet(DAILY_PATH, engine='pyarrow')['receita']
+
+# Troca separadores do formato americano (1,234.56) pelo brasileiro (1.234,56)
+_TABELA_MOEDA = str.maketrans({',': '.', '.': ','})
+
 def formatar_moeda(valor):
     """Formata valor como moeda brasileira."""
-    return f"R$ {valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    return f"R$ {valor:,.2f}".translate(_TABELA_MOEDA)
 
 def criar_kpi_cards(df):
     """Cria cards com KPIs principais."""
@@ -87,6 +109,11 @@ def criar_kpi_cards(df):
         clientes_unicos = df['id_cliente'].nunique()
         st.metric("👥 Clientes Únicos", f"{clientes_unicos:,}")
 
+def filtrar_categoria(serie, selecionados):
+    """Máscara booleana de uma coluna category comparando códigos, não strings."""
+    permitidos = serie.cat.categories.get_indexer(selecionados)
+    return np.isin(serie.cat.codes.values, permitidos[permitidos >= 0])
+
 def criar_filtros(df):
     """Cria filtros interativos na sidebar."""
     st.sidebar.header("🔍 Filtros")
@@ -105,46 +132,90 @@ def criar_filtros(df):
     # Filtro de região
     regioes = st.sidebar.multiselect(
         "Regiões",
-        options=sorted(df['regiao'].unique()),
-        default=sorted(df['regiao'].unique())
+        options=df['regiao'].cat.categories.tolist(),
+        default=df['regiao'].cat.categories.tolist()
     )
     
     # Filtro de status
     status = st.sidebar.multiselect(
         "Status de Venda",
-        options=sorted(df['status'].unique()),
-        default=sorted(df['status'].unique())
+        options=df['status'].cat.categories.tolist(),
+        default=df['status'].cat.categories.tolist()
     )
     
     # Filtro de segmento de cliente
     segmentos = st.sidebar.multiselect(
         "Segmento de Cliente",
-        options=sorted(df['segmento_cliente'].dropna().unique()),
-        default=sorted(df['segmento_cliente'].dropna().unique())
+        options=df['segmento_cliente'].cat.categories.tolist(),
+        default=df['segmento_cliente'].cat.categories.tolist()
     )
     
     # Filtro de forma de pagamento
     formas = st.sidebar.multiselect(
         "Forma de Pagamento",
-        options=sorted(df['forma_pagamento'].unique()),
-        default=sorted(df['forma_pagamento'].unique())
+        options=df['forma_pagamento'].cat.categories.tolist(),
+        default=df['forma_pagamento'].cat.categories.tolist()
     )
     
-    # Aplicar filtros
-    df_filtrado = df[
-        (df['data_venda'].dt.date >= data_inicio) &
-        (df['data_venda'].dt.date <= data_fim) &
-        (df['regiao'].isin(regioes)) &
-        (df['status'].isin(status)) &
-        (df['segmento_cliente'].isin(segmentos)) &
-        (df['forma_pagamento'].isin(formas))
-    ]
+    # Período: intervalo semiaberto [início, fim + 1 dia) localizado por busca binária,
+    # já que carregar_dados ordena por data_venda
+    inicio = np.datetime64(data_inicio)
+    fim = np.datetime64(data_fim) + np.timedelta64(1, 'D')
+    pos_inicio, pos_fim = np.searchsorted(df['data_venda'].values, [inicio, fim])
+    df_periodo = df.iloc[pos_inicio:pos_fim]
+    
+    # Categorias: uma única máscara NumPy sobre os códigos, só dentro do período
+    mascara_categorias = np.ones(len(df_periodo), dtype=bool)
+    for coluna, selecionados in [('regiao', regioes), ('status', status),
+                                 ('segmento_cliente', segmentos), ('forma_pagamento', formas)]:
+        mascara_categorias &= filtrar_categoria(df_periodo[coluna], selecionados)
+    df_filtrado = df_periodo[mascara_categorias]
     
     st.sidebar.info(f"📊 Registros após filtros: {len(df_filtrado):,} de {len(df):,}")
     
-    return df_filtrado
+    # O período só é devolvido quando nenhum filtro de categoria exclui registros dele
+    periodo = (data_inicio, data_fim) if mascara_categorias.all() else None
+    return df_filtrado, periodo
 
-def criar_graficos_vendas(df):
+def reduzir_lttb(x, y, n_pontos):
+    """Índices dos pontos mantidos pelo Largest-Triangle-Three-Buckets (LTTB)."""
+    n = len(y)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    tamanho = (n - 2) / (n_pontos - 2)
+    indices = np.empty(n_pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    anterior = 0
+    for i in range(n_pontos - 2):
+        # Média do próximo bucket é o terceiro vértice do triângulo
+        prox_inicio = int((i + 1) * tamanho) + 1
+        prox_fim = min(int((i + 2) * tamanho) + 1, n)
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+        
+        inicio = int(i * tamanho) + 1
+        fim = int((i + 1) * tamanho) + 1
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        indices[i + 1] = anterior
+    
+    return indices
+
+def calcular_agregacoes(df):
+    """Calcula de uma só vez os agregados compartilhados pelos gráficos."""
+    # Uma passada por coluna: contagem de vendas e receita juntas
+    colunas = ['regiao', 'status', 'produto', 'categoria', 'segmento_cliente', 'forma_pagamento']
+    return {
+        coluna: df.groupby(coluna, observed=True)['valor_final'].agg(['count', 'sum'])
+        for coluna in colunas
+    }
+
+def criar_graficos_vendas(df, agregacoes, receita_diaria=None):
     """Cria gráficos de análise de vendas."""
     st.header("📈 Análise de Vendas")
     
@@ -152,7 +223,7 @@ def criar_graficos_vendas(df):
     
     with col1:
         # Receita por região
-        receita_regiao = df.groupby('regiao')['valor_final'].sum().sort_values(ascending=False)
+        receita_regiao = agregacoes['regiao']['sum'].sort_values(ascending=False)
         fig_regiao = px.bar(
             x=receita_regiao.index,
             y=receita_regiao.values,
@@ -165,7 +236,7 @@ def criar_graficos_vendas(df):
     
     with col2:
         # Vendas por status
-        vendas_status = df['status'].value_counts()
+        vendas_status = agregacoes['status']['count'].sort_values(ascending=False)
         fig_status = px.pie(
             values=vendas_status.values,
             names=vendas_status.index,
@@ -174,19 +245,24 @@ def criar_graficos_vendas(df):
         )
         st.plotly_chart(fig_status, use_container_width=True)
     
-    # Série temporal
-    vendas_diarias = df.set_index('data_venda').resample('D')['valor_final'].sum()
+    # Série temporal (usa a receita diária do ETL quando só o período está filtrado)
+    if receita_diaria is not None:
+        vendas_diarias = receita_diaria
+    else:
+        vendas_diarias = df.set_index('data_venda').resample('D')['valor_final'].sum()
+    indices = reduzir_lttb(vendas_diarias.index.values.view('i8'), vendas_diarias.values, MAX_PONTOS_SERIE)
+    vendas_diarias = vendas_diarias.iloc[indices]
     fig_temporal = px.line(
         x=vendas_diarias.index,
         y=vendas_diarias.values,
         title="Receita Diária (Série Temporal)",
         labels={'x': 'Data', 'y': 'Receita (R$)'},
-        markers=True
+        markers=False
     )
     fig_temporal.update_traces(line=dict(color='#3498db', width=2))
     st.plotly_chart(fig_temporal, use_container_width=True)
 
-def criar_graficos_produtos(df):
+def criar_graficos_produtos(agregacoes):
     """Cria gráficos de análise de produtos."""
     st.header("🛍️  Análise de Produtos")
     
@@ -194,7 +270,7 @@ def criar_graficos_produtos(df):
     
     with col1:
         # Top 10 produtos por receita
-        top_produtos = df.groupby('produto')['valor_final'].sum().nlargest(10).sort_values()
+        top_produtos = agregacoes['produto']['sum'].nlargest(10).sort_values()
         fig_produtos = px.barh(
             y=top_produtos.index,
             x=top_produtos.values,
@@ -207,7 +283,7 @@ def criar_graficos_produtos(df):
     
     with col2:
         # Distribuição por categoria
-        vendas_categoria = df['categoria'].value_counts()
+        vendas_categoria = agregacoes['categoria']['count'].sort_values(ascending=False)
         fig_categoria = px.pie(
             values=vendas_categoria.values,
             names=vendas_categoria.index,
@@ -215,7 +291,7 @@ def criar_graficos_produtos(df):
         )
         st.plotly_chart(fig_categoria, use_container_width=True)
 
-def criar_graficos_clientes(df):
+def criar_graficos_clientes(agregacoes):
     """Cria gráficos de análise de clientes."""
     st.header("👥 Análise de Clientes")
     
@@ -223,7 +299,7 @@ def criar_graficos_clientes(df):
     
     with col1:
         # Segmentação de clientes
-        segmento_clientes = df['segmento_cliente'].value_counts()
+        segmento_clientes = agregacoes['segmento_cliente']['count'].sort_values(ascending=False)
         fig_segmento = px.pie(
             values=segmento_clientes.values,
             names=segmento_clientes.index,
@@ -234,7 +310,7 @@ def criar_graficos_clientes(df):
     
     with col2:
         # Receita por segmento
-        receita_segmento = df.groupby('segmento_cliente')['valor_final'].sum().sort_values(ascending=False)
+        receita_segmento = agregacoes['segmento_cliente']['sum'].sort_values(ascending=False)
         fig_receita_seg = px.bar(
             x=receita_segmento.index,
             y=receita_segmento.values,
@@ -245,7 +321,7 @@ def criar_graficos_clientes(df):
         )
         st.plotly_chart(fig_receita_seg, use_container_width=True)
 
-def criar_graficos_pagamento(df):
+def criar_graficos_pagamento(agregacoes):
     """Cria gráficos de análise de pagamento."""
     st.header("💳 Análise de Formas de Pagamento")
     
@@ -253,7 +329,7 @@ def criar_graficos_pagamento(df):
     
     with col1:
         # Distribuição de formas de pagamento
-        formas = df['forma_pagamento'].value_counts()
+        formas = agregacoes['forma_pagamento']['count'].sort_values(ascending=False)
         fig_formas = px.pie(
             values=formas.values,
             names=formas.index,
@@ -263,7 +339,7 @@ def criar_graficos_pagamento(df):
     
     with col2:
         # Receita por forma de pagamento
-        receita_forma = df.groupby('forma_pagamento')['valor_final'].sum().sort_values(ascending=False)
+        receita_forma = agregacoes['forma_pagamento']['sum'].sort_values(ascending=False)
         fig_receita_forma = px.bar(
             x=receita_forma.index,
             y=receita_forma.values,
@@ -292,14 +368,29 @@ def criar_tabela_detalhes(df):
     df_exibicao = df[colunas].sort_values(by=coluna_ordem, ascending=False).head(100)
     st.dataframe(df_exibicao, use_container_width=True)
     
-    # Download dos dados
-    csv = df_exibicao.to_csv(index=False, encoding='utf-8')
-    st.download_button(
-        label="📥 Baixar dados em CSV",
-        data=csv,
-        file_name=f"vendas_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    # Download dos dados (escrita em buffer binário, em blocos)
+    nome_arquivo = f"vendas_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        buffer_csv = io.BytesIO()
+        df_exibicao.to_csv(buffer_csv, index=False, encoding='utf-8', chunksize=10_000)
+        st.download_button(
+            label="📥 Baixar dados em CSV",
+            data=buffer_csv.getvalue(),
+            file_name=f"{nome_arquivo}.csv",
+            mime="text/csv"
+        )
+    
+    with col2:
+        buffer_parquet = io.BytesIO()
+        df_exibicao.to_parquet(buffer_parquet, engine='pyarrow', compression='zstd', index=False)
+        st.download_button(
+            label="📥 Baixar dados em Parquet",
+            data=buffer_parquet.getvalue(),
+            file_name=f"{nome_arquivo}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
 
 def main():
     """Função principal do dashboard."""
@@ -308,26 +399,34 @@ def main():
     st.markdown("---")
     
     # Carregar dados
-    df = carregar_dados()
+    df = carregar_dados(os.path.getmtime(DATA_PATH))
     
     # Criar filtros
-    df_filtrado = criar_filtros(df)
+    df_filtrado, periodo = criar_filtros(df)
+    
+    # Sem filtros de categoria, a série diária vem pronta do ETL (fatiada pelo índice ordenado)
+    receita_diaria = None
+    if periodo is not None and os.path.exists(DAILY_PATH):
+        data_inicio, data_fim = periodo
+        receita_diaria = carregar_receita_diaria(os.path.getmtime(DAILY_PATH))
+        receita_diaria = receita_diaria.loc[pd.Timestamp(data_inicio):pd.Timestamp(data_fim)]
     
     # KPIs principais
     criar_kpi_cards(df_filtrado)
     st.markdown("---")
     
-    # Gráficos
-    criar_graficos_vendas(df_filtrado)
+    # Gráficos (agregados calculados uma vez e compartilhados)
+    agregacoes = calcular_agregacoes(df_filtrado)
+    criar_graficos_vendas(df_filtrado, agregacoes, receita_diaria)
     st.markdown("---")
     
-    criar_graficos_produtos(df_filtrado)
+    criar_graficos_produtos(agregacoes)
     st.markdown("---")
     
-    criar_graficos_clientes(df_filtrado)
+    criar_graficos_clientes(agregacoes)
     st.markdown("---")
     
-    criar_graficos_pagamento(df_filtrado)
+    criar_graficos_pagamento(agregacoes)
     st.markdown("---")
     
     # Tabela de detalhes
@@ -6,77 +6,109 @@ Gera insights, estatísticas e visualizações dos dados de vendas.
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Renderização sem janela; os gráficos só são salvos em PNG
 import matplotlib.pyplot as plt
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
 from datetime import datetime
+import io
 import os
 
 # Configurações
-INPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.csv')
+INPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.parquet')
+DAILY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'receita_diaria.parquet')
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'notebooks')
 
 # Estilo
 sns.set_style("whitegrid")
 plt.rcParams['figure.figsize'] = (14, 8)
 plt.rcParams['font.size'] = 10
+plt.rcParams['figure.dpi'] = 120
+plt.rcParams['savefig.dpi'] = 120
 
 def carregar_dados():
     """Carrega os dados processados."""
-    df = pd.read_csv(INPUT_PATH, parse_dates=['data_venda'])
+    df = pd.read_parquet(INPUT_PATH, engine='pyarrow')
     return df
 
+def carregar_receita_diaria():
+    """Carrega a receita diária pré-calculada pelo ETL (None se o arquivo não existir)."""
+    if not os.path.exists(DAILY_PATH):
+        return None
+    return pd.read_parquet(DAILY_PATH, engine='pyarrow')['receita']
+
+def agregar_por_grupo(df, coluna):
+    """Contagem, receita, ticket médio e taxa de sucesso por grupo via np.bincount."""
+    categorias = df[coluna].cat.categories
+    codigos = df[coluna].cat.codes.to_numpy()
+    validos = codigos >= 0
+    codigos = codigos[validos]
+    
+    contagem = np.bincount(codigos, minlength=len(categorias))
+    receita = np.bincount(codigos, weights=df['valor_final'].to_numpy()[validos], minlength=len(categorias))
+    sucessos = np.bincount(codigos, weights=df['venda_sucesso'].to_numpy()[validos], minlength=len(categorias))
+    
+    with np.errstate(invalid='ignore'):
+        stats = pd.DataFrame({
+            'Total Vendas': contagem,
+            'Receita Total': receita,
+            'Ticket Médio': receita / contagem,
+            'Taxa Sucesso': sucessos / contagem,
+        }, index=pd.Index(categorias, name=coluna))
+    
+    # Apenas grupos presentes nos dados
+    return stats[contagem > 0]
+
 def analise_vendas_por_regiao(df):
     """Analisa vendas por região."""
     print("\n📍 ANÁLISE POR REGIÃO")
     print("=" * 60)
     
-    regiao_stats = df.groupby('regiao').agg({
-        'id_venda': 'count',
-        'valor_final': ['sum', 'mean'],
-        'venda_sucesso': 'mean'
-    }).round(2)
+    regiao_stats = agregar_por_grupo(df, 'regiao')
+    regiao_stats['Taxa Sucesso'] = regiao_stats['Taxa Sucesso'] * 100
     
-    regiao_stats.columns = ['Total Vendas', 'Receita Total', 'Ticket Médio', 'Taxa Sucesso']
-    regiao_stats['Taxa Sucesso'] = (regiao_stats['Taxa Sucesso'] * 100).round(2)
-    
-    print(regiao_stats)
+    print(regiao_stats.round(2))
     
     # Visualização
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     fig.suptitle('Análise de Vendas por Região', fontsize=16, fontweight='bold')
     
     # Receita por região
-    df.groupby('regiao')['valor_final'].sum().sort_values(ascending=False).plot(
-        kind='bar', ax=axes[0, 0], color='#2E86AB'
+    regiao_stats['Receita Total'].sort_values(ascending=False).plot(
+        kind='bar', rasterized=True, ax=axes[0, 0], color='#2E86AB'
     )
     axes[0, 0].set_title('Receita Total por Região')
     axes[0, 0].set_ylabel('Receita (R$)')
     axes[0, 0].tick_params(axis='x', rotation=45)
     
     # Quantidade de vendas
-    df['regiao'].value_counts().plot(kind='bar', ax=axes[0, 1], color='#A23B72')
+    regiao_stats['Total Vendas'].sort_values(ascending=False).plot(kind='bar', rasterized=True, ax=axes[0, 1], color='#A23B72')
     axes[0, 1].set_title('Quantidade de Vendas por Região')
     axes[0, 1].set_ylabel('Número de Vendas')
     axes[0, 1].tick_params(axis='x', rotation=45)
     
     # Ticket médio
-    df.groupby('regiao')['valor_final'].mean().sort_values(ascending=False).plot(
-        kind='bar', ax=axes[1, 0], color='#F18F01'
+    regiao_stats['Ticket Médio'].sort_values(ascending=False).plot(
+        kind='bar', rasterized=True, ax=axes[1, 0], color='#F18F01'
     )
     axes[1, 0].set_title('Ticket Médio por Região')
     axes[1, 0].set_ylabel('Valor (R$)')
     axes[1, 0].tick_params(axis='x', rotation=45)
     
     # Taxa de sucesso
-    (df.groupby('regiao')['venda_sucesso'].mean() * 100).sort_values(ascending=False).plot(
-        kind='bar', ax=axes[1, 1], color='#06A77D'
+    regiao_stats['Taxa Sucesso'].sort_values(ascending=False).plot(
+        kind='bar', rasterized=True, ax=axes[1, 1], color='#06A77D'
     )
     axes[1, 1].set_title('Taxa de Sucesso por Região (%)')
     axes[1, 1].set_ylabel('Percentual (%)')
     axes[1, 1].tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'analise_regiao.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'analise_regiao.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: analise_regiao.png")
 
 def analise_produtos_top(df):
@@ -84,47 +116,47 @@ def analise_produtos_top(df):
     print("\n🛍️  PRODUTOS TOP 10")
     print("=" * 60)
     
-    produtos_stats = df.groupby('produto').agg({
+    produtos_stats = df.groupby('produto', observed=True).agg({
         'id_venda': 'count',
         'valor_final': ['sum', 'mean'],
         'quantidade': 'sum'
-    }).round(2)
+    })
     
     produtos_stats.columns = ['Vendas', 'Receita Total', 'Ticket Médio', 'Quantidade']
-    produtos_stats = produtos_stats.sort_values('Receita Total', ascending=False).head(10)
     
-    print(produtos_stats)
+    print(produtos_stats.sort_values('Receita Total', ascending=False).head(10).round(2))
     
     # Visualização
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     fig.suptitle('Top 10 Produtos', fontsize=16, fontweight='bold')
     
-    top_produtos = df.groupby('produto')['valor_final'].sum().nlargest(10).sort_values()
-    top_produtos.plot(kind='barh', ax=axes[0, 0], color='#2E86AB')
+    top_produtos = produtos_stats['Receita Total'].nlargest(10).sort_values()
+    top_produtos.plot(kind='barh', rasterized=True, ax=axes[0, 0], color='#2E86AB')
     axes[0, 0].set_title('Receita Total')
     axes[0, 0].set_xlabel('Receita (R$)')
     
-    top_vendas = df['produto'].value_counts().head(10).sort_values()
-    top_vendas.plot(kind='barh', ax=axes[0, 1], color='#A23B72')
+    top_vendas = produtos_stats['Vendas'].nlargest(10).sort_values()
+    top_vendas.plot(kind='barh', rasterized=True, ax=axes[0, 1], color='#A23B72')
     axes[0, 1].set_title('Quantidade de Vendas')
     axes[0, 1].set_xlabel('Número de Vendas')
     
-    top_ticket = df.groupby('produto')['valor_final'].mean().nlargest(10).sort_values()
-    top_ticket.plot(kind='barh', ax=axes[1, 0], color='#F18F01')
+    top_ticket = produtos_stats['Ticket Médio'].nlargest(10).sort_values()
+    top_ticket.plot(kind='barh', rasterized=True, ax=axes[1, 0], color='#F18F01')
     axes[1, 0].set_title('Ticket Médio')
     axes[1, 0].set_xlabel('Valor (R$)')
     
-    top_quantidade = df.groupby('produto')['quantidade'].sum().nlargest(10).sort_values()
-    top_quantidade.plot(kind='barh', ax=axes[1, 1], color='#06A77D')
+    top_quantidade = produtos_stats['Quantidade'].nlargest(10).sort_values()
+    top_quantidade.plot(kind='barh', rasterized=True, ax=axes[1, 1], color='#06A77D')
     axes[1, 1].set_title('Quantidade Total Vendida')
     axes[1, 1].set_xlabel('Unidades')
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'top_produtos.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'top_produtos.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: top_produtos.png")
 
-def analise_temporal(df):
-    """Analisa tendências temporais."""
+def analise_temporal(df, receita_diaria=None):
+    """Analisa tendências temporais (receita_diaria deve corresponder ao mesmo df)."""
     print("\n📅 ANÁLISE TEMPORAL")
     print("=" * 60)
     
@@ -140,25 +172,27 @@ def analise_temporal(df):
     fig, axes = plt.subplots(2, 1, figsize=(15, 10))
     fig.suptitle('Análise Temporal de Vendas', fontsize=16, fontweight='bold')
     
-    # Série temporal de receita
-    df_temporal = df.set_index('data_venda').resample('D')['valor_final'].sum()
-    df_temporal.plot(ax=axes[0], color='#2E86AB', linewidth=2)
+    # Série temporal de receita (pré-calculada pelo ETL ou, na falta dela, calculada a partir do df)
+    if receita_diaria is None:
+        receita_diaria = df.set_index('data_venda').resample('D')['valor_final'].sum()
+    receita_diaria.plot(ax=axes[0], color='#2E86AB', linewidth=2)
     axes[0].set_title('Receita Diária (Série Temporal)')
     axes[0].set_ylabel('Receita (R$)')
     axes[0].grid(True, alpha=0.3)
     
     # Vendas por dia da semana
-    vendas_dia_semana = df.groupby('dia_semana')['id_venda'].count()
+    vendas_dia_semana = df.groupby('dia_semana', observed=True)['id_venda'].count()
     ordem_dias = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     vendas_dia_semana = vendas_dia_semana.reindex(ordem_dias)
-    vendas_dia_semana.plot(kind='bar', ax=axes[1], color='#A23B72')
+    vendas_dia_semana.plot(kind='bar', rasterized=True, ax=axes[1], color='#A23B72')
     axes[1].set_title('Vendas por Dia da Semana')
     axes[1].set_ylabel('Número de Vendas')
     axes[1].set_xlabel('Dia da Semana')
     axes[1].tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'analise_temporal.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'analise_temporal.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: analise_temporal.png")
 
 def analise_segmentacao_clientes(df):
@@ -166,52 +200,53 @@ def analise_segmentacao_clientes(df):
     print("\n👥 SEGMENTAÇÃO DE CLIENTES")
     print("=" * 60)
     
-    segmento_stats = df.groupby('segmento_cliente').agg({
+    segmento_stats = df.groupby('segmento_cliente', observed=True).agg({
         'id_cliente': 'nunique',
         'id_venda': 'count',
         'valor_final': ['sum', 'mean']
-    }).round(2)
+    })
     
     segmento_stats.columns = ['Clientes Únicos', 'Total Vendas', 'Receita Total', 'Ticket Médio']
-    print(segmento_stats)
+    print(segmento_stats.round(2))
     
     # Visualização
     fig, axes = plt.subplots(2, 2, figsize=(15, 10))
     fig.suptitle('Segmentação de Clientes', fontsize=16, fontweight='bold')
     
     # Distribuição de clientes
-    df.groupby('segmento_cliente')['id_cliente'].nunique().plot(
+    segmento_stats['Clientes Únicos'].plot(
         kind='pie', ax=axes[0, 0], autopct='%1.1f%%', colors=['#2E86AB', '#A23B72', '#F18F01']
     )
     axes[0, 0].set_title('Distribuição de Clientes por Segmento')
     axes[0, 0].set_ylabel('')
     
     # Receita por segmento
-    df.groupby('segmento_cliente')['valor_final'].sum().plot(
-        kind='bar', ax=axes[0, 1], color=['#2E86AB', '#A23B72', '#F18F01']
+    segmento_stats['Receita Total'].plot(
+        kind='bar', rasterized=True, ax=axes[0, 1], color=['#2E86AB', '#A23B72', '#F18F01']
     )
     axes[0, 1].set_title('Receita Total por Segmento')
     axes[0, 1].set_ylabel('Receita (R$)')
     axes[0, 1].tick_params(axis='x', rotation=45)
     
     # Ticket médio por segmento
-    df.groupby('segmento_cliente')['valor_final'].mean().plot(
-        kind='bar', ax=axes[1, 0], color=['#2E86AB', '#A23B72', '#F18F01']
+    segmento_stats['Ticket Médio'].plot(
+        kind='bar', rasterized=True, ax=axes[1, 0], color=['#2E86AB', '#A23B72', '#F18F01']
     )
     axes[1, 0].set_title('Ticket Médio por Segmento')
     axes[1, 0].set_ylabel('Valor (R$)')
     axes[1, 0].tick_params(axis='x', rotation=45)
     
     # Quantidade de vendas por segmento
-    df.groupby('segmento_cliente')['id_venda'].count().plot(
-        kind='bar', ax=axes[1, 1], color=['#2E86AB', '#A23B72', '#F18F01']
+    segmento_stats['Total Vendas'].plot(
+        kind='bar', rasterized=True, ax=axes[1, 1], color=['#2E86AB', '#A23B72', '#F18F01']
     )
     axes[1, 1].set_title('Quantidade de Vendas por Segmento')
     axes[1, 1].set_ylabel('Número de Vendas')
     axes[1, 1].tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'segmentacao_clientes.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'segmentacao_clientes.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: segmentacao_clientes.png")
 
 def analise_formas_pagamento(df):
@@ -219,36 +254,33 @@ def analise_formas_pagamento(df):
     print("\n💳 ANÁLISE DE FORMAS DE PAGAMENTO")
     print("=" * 60)
     
-    pagamento_stats = df.groupby('forma_pagamento').agg({
-        'id_venda': 'count',
-        'valor_final': ['sum', 'mean']
-    }).round(2)
-    
-    pagamento_stats.columns = ['Total Vendas', 'Receita Total', 'Ticket Médio']
+    pagamento_stats = agregar_por_grupo(df, 'forma_pagamento')
+    pagamento_stats = pagamento_stats[['Total Vendas', 'Receita Total', 'Ticket Médio']]
     pagamento_stats = pagamento_stats.sort_values('Receita Total', ascending=False)
-    print(pagamento_stats)
+    print(pagamento_stats.round(2))
     
     # Visualização
     fig, axes = plt.subplots(1, 2, figsize=(15, 6))
     fig.suptitle('Análise de Formas de Pagamento', fontsize=16, fontweight='bold')
     
     # Distribuição de vendas
-    df['forma_pagamento'].value_counts().plot(
+    pagamento_stats['Total Vendas'].sort_values(ascending=False).plot(
         kind='pie', ax=axes[0], autopct='%1.1f%%'
     )
     axes[0].set_title('Distribuição de Vendas por Forma de Pagamento')
     axes[0].set_ylabel('')
     
     # Receita por forma
-    df.groupby('forma_pagamento')['valor_final'].sum().sort_values(ascending=False).plot(
-        kind='bar', ax=axes[1], color='#2E86AB'
+    pagamento_stats['Receita Total'].plot(
+        kind='bar', rasterized=True, ax=axes[1], color='#2E86AB'
     )
     axes[1].set_title('Receita Total por Forma de Pagamento')
     axes[1].set_ylabel('Receita (R$)')
     axes[1].tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'formas_pagamento.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'formas_pagamento.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: formas_pagamento.png")
 
 def analise_status_vendas(df):
@@ -256,36 +288,33 @@ def analise_status_vendas(df):
     print("\n📊 ANÁLISE DE STATUS DE VENDAS")
     print("=" * 60)
     
-    status_stats = df.groupby('status').agg({
-        'id_venda': 'count',
-        'valor_final': ['sum', 'mean']
-    }).round(2)
-    
-    status_stats.columns = ['Total Vendas', 'Receita Total', 'Ticket Médio']
-    status_stats['Percentual'] = (status_stats['Total Vendas'] / status_stats['Total Vendas'].sum() * 100).round(2)
-    print(status_stats)
+    status_stats = agregar_por_grupo(df, 'status')
+    status_stats = status_stats[['Total Vendas', 'Receita Total', 'Ticket Médio']]
+    status_stats['Percentual'] = status_stats['Total Vendas'] / status_stats['Total Vendas'].sum() * 100
+    print(status_stats.round(2))
     
     # Visualização
     fig, axes = plt.subplots(1, 2, figsize=(15, 6))
     fig.suptitle('Análise de Status de Vendas', fontsize=16, fontweight='bold')
     
     # Distribuição de status
-    df['status'].value_counts().plot(
+    status_stats['Total Vendas'].sort_values(ascending=False).plot(
         kind='pie', ax=axes[0], autopct='%1.1f%%', colors=['#06A77D', '#F18F01', '#A23B72', '#2E86AB']
     )
     axes[0].set_title('Distribuição de Status')
     axes[0].set_ylabel('')
     
     # Receita por status
-    df.groupby('status')['valor_final'].sum().sort_values(ascending=False).plot(
-        kind='bar', ax=axes[1], color=['#06A77D', '#F18F01', '#A23B72', '#2E86AB']
+    status_stats['Receita Total'].sort_values(ascending=False).plot(
+        kind='bar', rasterized=True, ax=axes[1], color=['#06A77D', '#F18F01', '#A23B72', '#2E86AB']
     )
     axes[1].set_title('Receita Total por Status')
     axes[1].set_ylabel('Receita (R$)')
     axes[1].tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(os.path.join(OUTPUT_DIR, 'status_vendas.png'), dpi=300, bbox_inches='tight')
+    plt.savefig(os.path.join(OUTPUT_DIR, 'status_vendas.png'), bbox_inches='tight')
+    plt.close(fig)
     print("\n✅ Gráfico salvo: status_vendas.png")
 
 def gerar_relatorio_resumido(df):
@@ -312,7 +341,7 @@ CLIENTES E PRODUTOS:
 
 DISTRIBUIÇÃO GEOGRÁFICA:
 - Regiões: {', '.join(df['regiao'].unique())}
-- Região com Maior Receita: {df.groupby('regiao')['valor_final'].sum().idxmax()}
+- Região com Maior Receita: {df.groupby('regiao', observed=True)['valor_final'].sum().idxmax()}
 
 SEGMENTAÇÃO DE CLIENTES:
 {df['segmento_cliente'].value_counts().to_string()}
@@ -333,6 +362,14 @@ PERÍODO ANALISADO:
     
     print("\n✅ Relatório salvo: relatorio_resumido.txt")
 
+def executar_analise(analise):
+    """Executa uma análise em um processo do pool e devolve o texto impresso."""
+    # Cada processo lê o próprio Parquet em vez de receber o DataFrame serializado
+    saida = io.StringIO()
+    with redirect_stdout(saida):
+        analise(carregar_dados())
+    return saida.getvalue()
+
 def main():
     """Executa a análise completa."""
     print("\n" + "=" * 60)
@@ -342,17 +379,21 @@ def main():
     # Criar diretório de saída
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # Carregar dados
-    df = carregar_dados()
-    
-    # Executar análises
-    analise_vendas_por_regiao(df)
-    analise_produtos_top(df)
-    analise_temporal(df)
-    analise_segmentacao_clientes(df)
-    analise_formas_pagamento(df)
-    analise_status_vendas(df)
-    gerar_relatorio_resumido(df)
+    # Executar análises (independentes entre si) em paralelo, um processo por análise
+    analises = [
+        analise_vendas_por_regiao,
+        analise_produtos_top,
+        # A receita diária do ETL cobre o dataset completo, o mesmo que cada processo carrega
+        partial(analise_temporal, receita_diaria=carregar_receita_diaria()),
+        analise_segmentacao_clientes,
+        analise_formas_pagamento,
+        analise_status_vendas,
+        gerar_relatorio_resumido,
+    ]
+    with ProcessPoolExecutor(max_workers=min(len(analises), os.cpu_count() or 1)) as executor:
+        # A saída de cada análise é impressa na ordem original
+        for saida in executor.map(executar_analise, analises):
+            print(saida, end='')
     
     print("\n" + "=" * 60)
     print("✅ Análise EDA concluída com sucesso!")
@@ -6,26 +6,122 @@ Realiza limpeza, transformação e enriquecimento dos dados.
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 import os
 
 INPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas.csv')
-OUTPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.csv')
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas_processadas.parquet')
+DAILY_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'receita_diaria.parquet')
+
+# Linhas lidas por bloco do CSV bruto (limita o pico de memória)
+CHUNK_SIZE = 200_000
+
+# Colunas de baixa cardinalidade armazenadas como category no Parquet
+COLUNAS_CATEGORICAS = [
+    'regiao', 'status', 'segmento_cliente', 'forma_pagamento', 'categoria',
+    'faixa_valor', 'tempo_entrega_cat', 'dia_semana', 'mes_nome',
+]
+
+# Dias da semana na ordem de dt.dayofweek (segunda = 0)
+DIAS_SEMANA = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Tipos fixos (independentes dos valores de cada bloco), para o schema de saída ser sempre o mesmo
+TIPOS_NUMERICOS = {
+    'valor_unitario': 'float64',
+    'valor_total': 'float64',
+    'valor_final': 'float64',
+    'quantidade': 'int16',
+    'dias_para_entrega': 'Int16',  # nulo para vendas não concluídas
+}
+
+# Schema explícito do Parquet de saída: todos os blocos são convertidos para ele,
+# em vez de herdarem os tipos do primeiro bloco
+CATEGORIA = pa.dictionary(pa.int32(), pa.string())
+CATEGORIA_ORDENADA = pa.dictionary(pa.int32(), pa.string(), ordered=True)
+ESQUEMA_PARQUET = pa.schema([
+    ('id_venda', pa.string()),
+    ('data_venda', pa.timestamp('ns')),
+    ('id_cliente', pa.string()),
+    ('cliente_nome', CATEGORIA),
+    ('produto', CATEGORIA),
+    ('categoria', CATEGORIA),
+    ('quantidade', pa.int16()),
+    ('preco_unitario', pa.int64()),
+    ('valor_total', pa.float64()),
+    ('desconto_percentual', pa.int64()),
+    ('valor_final', pa.float64()),
+    ('regiao', CATEGORIA),
+    ('forma_pagamento', CATEGORIA),
+    ('status', CATEGORIA),
+    ('dias_para_entrega', pa.int16()),
+    ('valor_unitario', pa.float64()),
+    ('ano', pa.int32()),
+    ('mes', pa.int32()),
+    ('mes_nome', CATEGORIA),
+    ('trimestre', pa.int32()),
+    ('semana', pa.uint32()),
+    ('dia_semana', CATEGORIA_ORDENADA),
+    ('faixa_valor', CATEGORIA_ORDENADA),
+    ('margem_lucro', pa.float64()),
+    ('segmento_cliente', CATEGORIA_ORDENADA),
+    ('venda_sucesso', pa.int8()),
+    ('tempo_entrega_cat', CATEGORIA_ORDENADA),
+])
+
+# Colunas lidas de volta do Parquet para o cálculo dos KPIs
+COLUNAS_KPIS = ['valor_final', 'venda_sucesso', 'id_cliente', 'produto', 'margem_lucro']
 
 def carregar_dados():
-    """Carrega os dados brutos."""
+    """Carrega os dados brutos em blocos de CHUNK_SIZE linhas."""
     print("📥 Carregando dados...")
-    df = pd.read_csv(INPUT_PATH, parse_dates=['data_venda'])
-    print(f"✅ {len(df)} registros carregados")
-    return df
+    return pd.read_csv(INPUT_PATH, parse_dates=['data_venda'], chunksize=CHUNK_SIZE)
+
+def marcar_primeiras_ocorrencias(ids, vistos):
+    """Marca a primeira ocorrência de cada id; vistos é o array ordenado dos hashes já vistos."""
+    novos = ~ids.duplicated().to_numpy()
+    
+    # Hash uint64 por id (8 bytes por linha, sem objetos Python); colisão é desprezível em 64 bits.
+    # Buscar os hashes já ordenados mantém a busca binária amigável ao cache.
+    hashes = pd.util.hash_array(ids.to_numpy(), categorize=False)
+    ordem = np.argsort(hashes)
+    ordenados = hashes[ordem]
+    posicoes = np.searchsorted(vistos, ordenados)
+    dentro = posicoes < len(vistos)
+    encontrados = np.zeros(len(ordenados), dtype=bool)
+    encontrados[dentro] = vistos[posicoes[dentro]] == ordenados[dentro]
+    novos[ordem[encontrados]] = False
+    
+    # Inserção ordenada dos hashes novos (mantém a busca binária válida para o próximo bloco)
+    inserir = novos[ordem]
+    return novos, np.insert(vistos, posicoes[inserir], ordenados[inserir])
+
+def calcular_valor_por_cliente():
+    """Primeira passada: soma de valor_final por cliente e máscara das linhas não duplicadas."""
+    print("\n👥 Somando valor por cliente...")
+    vistos = np.empty(0, dtype=np.uint64)
+    manter = []
+    valor_por_cliente = pd.Series(dtype='float64')
+    
+    for bloco in pd.read_csv(INPUT_PATH, usecols=['id_venda', 'id_cliente', 'valor_final'], chunksize=CHUNK_SIZE):
+        novos, vistos = marcar_primeiras_ocorrencias(bloco['id_venda'], vistos)
+        manter.append(novos)
+        soma = bloco[novos].groupby('id_cliente')['valor_final'].sum()
+        valor_por_cliente = valor_por_cliente.add(soma, fill_value=0)
+    
+    # A segunda passada reaproveita a máscara (1 byte por linha) em vez de rastrear os ids de novo
+    print(f"  ✅ {len(valor_por_cliente)} clientes")
+    return valor_por_cliente, np.concatenate(manter) if manter else np.zeros(0, dtype=bool)
 
-def limpar_dados(df):
+def limpar_dados(df, manter=None):
     """Realiza limpeza básica dos dados."""
     print("\n🧹 Limpando dados...")
     
-    # Remover duplicatas
+    # Remover duplicatas (manter vem da primeira passada e já considera os blocos anteriores)
     duplicatas_antes = len(df)
-    df = df.drop_duplicates(subset=['id_venda'])
+    duplicados = df['id_venda'].duplicated() if manter is None else ~manter
+    df = df[~duplicados].copy()
     print(f"  - Removidas {duplicatas_antes - len(df)} duplicatas")
     
     # Verificar valores nulos
@@ -35,13 +131,25 @@ def limpar_dados(df):
     
     # Converter tipos de dados
     df['data_venda'] = pd.to_datetime(df['data_venda'])
-    df['valor_unitario'] = df['preco_unitario'].astype(float)
-    df['valor_total'] = df['valor_total'].astype(float)
-    df['valor_final'] = df['valor_final'].astype(float)
-    
+    df['valor_unitario'] = df['preco_unitario']
+    df = df.astype(TIPOS_NUMERICOS)
+
+    # Textos de baixa cardinalidade como category
+    for coluna in ['regiao', 'status', 'forma_pagamento', 'categoria', 'produto', 'cliente_nome']:
+        df[coluna] = df[coluna].astype('category')
+
     return df
 
-def transformar_dados(df):
+def classificar_faixas(valores, limites, rotulos, incluir_menor=False):
+    """Classifica valores em faixas (a, b] como pd.cut, via np.searchsorted."""
+    codigos = np.searchsorted(limites, valores, side='left') - 1
+    if incluir_menor:
+        codigos[valores == limites[0]] = 0
+    # Fora dos limites (ou nulo) vira NaN, como no pd.cut
+    codigos[(codigos < 0) | (codigos >= len(rotulos))] = -1
+    return pd.Categorical.from_codes(codigos, categories=rotulos, ordered=True)
+
+def transformar_dados(df, valor_por_cliente=None):
     """Realiza transformações e enriquecimento dos dados."""
     print("\n🔄 Transformando dados...")
     
@@ -51,33 +159,35 @@ def transformar_dados(df):
     df['mes_nome'] = df['data_venda'].dt.strftime('%B')
     df['trimestre'] = df['data_venda'].dt.quarter
     df['semana'] = df['data_venda'].dt.isocalendar().week
-    df['dia_semana'] = df['data_venda'].dt.day_name()
+    df['dia_semana'] = pd.Categorical.from_codes(df['data_venda'].dt.dayofweek.to_numpy(dtype=np.int8),
+                                                 categories=DIAS_SEMANA, ordered=True)
     
     # Criar faixas de valor
-    df['faixa_valor'] = pd.cut(df['valor_final'], 
-                                bins=[0, 1000, 5000, 10000, 50000],
-                                labels=['Baixo (< 1k)', 'Médio (1k-5k)', 'Alto (5k-10k)', 'Premium (> 10k)'])
+    df['faixa_valor'] = classificar_faixas(df['valor_final'].to_numpy(),
+                                           limites=[0, 1000, 5000, 10000, 50000],
+                                           rotulos=['Baixo (< 1k)', 'Médio (1k-5k)', 'Alto (5k-10k)', 'Premium (> 10k)'])
     
     # Calcular margem de lucro simulada (assumindo 30% de custo)
     df['margem_lucro'] = df['valor_final'] * 0.30
     
-    # Classificar clientes por valor
-    cliente_valor = df.groupby('id_cliente')['valor_final'].sum().reset_index()
-    cliente_valor.columns = ['id_cliente', 'valor_total_cliente']
-    cliente_valor['segmento_cliente'] = pd.cut(cliente_valor['valor_total_cliente'],
-                                                bins=[0, 5000, 20000, 100000],
-                                                labels=['Bronze', 'Prata', 'Ouro'])
-    
-    df = df.merge(cliente_valor[['id_cliente', 'segmento_cliente']], on='id_cliente', how='left')
+    # Classificar clientes por valor (transform evita o merge com uma tabela auxiliar);
+    # no processamento em blocos os totais vêm da primeira passada
+    if valor_por_cliente is None:
+        valor_total_cliente = df.groupby('id_cliente')['valor_final'].transform('sum')
+    else:
+        valor_total_cliente = df['id_cliente'].map(valor_por_cliente)
+    df['segmento_cliente'] = classificar_faixas(valor_total_cliente.to_numpy(),
+                                                limites=[0, 5000, 20000, 100000],
+                                                rotulos=['Bronze', 'Prata', 'Ouro'])
     
-    # Indicador de venda bem-sucedida
-    df['venda_sucesso'] = (df['status'] == 'Concluída').astype(int)
+    # Indicador de venda bem-sucedida (status é category: a comparação usa os códigos)
+    df['venda_sucesso'] = (df['status'] == 'Concluída').astype(np.int8)
     
     # Tempo de entrega categorizado
-    df['tempo_entrega_cat'] = pd.cut(df['dias_para_entrega'],
-                                      bins=[0, 7, 14, 21, 31],
-                                      labels=['Rápido (1-7d)', 'Normal (8-14d)', 'Lento (15-21d)', 'Muito Lento (22-30d)'],
-                                      include_lowest=True)
+    df['tempo_entrega_cat'] = classificar_faixas(df['dias_para_entrega'].to_numpy(dtype='float64', na_value=np.nan),
+                                                 limites=[0, 7, 14, 21, 31],
+                                                 rotulos=['Rápido (1-7d)', 'Normal (8-14d)', 'Lento (15-21d)', 'Muito Lento (22-30d)'],
+                                                 incluir_menor=True)
     
     print("  ✅ Componentes de data extraídos")
     print("  ✅ Faixas de valor criadas")
@@ -114,17 +224,63 @@ def calcular_kpis(df):
     
     return kpis
 
-def salvar_dados(df):
-    """Salva os dados processados."""
-    print("\n💾 Salvando dados processados...")
+def processar_blocos(valor_por_cliente, manter):
+    """Segunda passada: limpa e transforma cada bloco do CSV bruto."""
+    inicio = 0
+    for bloco in carregar_dados():
+        print(f"\n📦 Bloco com {len(bloco)} registros")
+        fim = inicio + len(bloco)
+        bloco = limpar_dados(bloco, manter[inicio:fim])
+        inicio = fim
+        yield transformar_dados(bloco, valor_por_cliente)
+    print(f"\n✅ {inicio} registros carregados")
+
+def salvar_dados(blocos):
+    """Salva os blocos processados em um único arquivo Parquet."""
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    df.to_csv(OUTPUT_PATH, index=False, encoding='utf-8')
+    writer = None
+    amostra = None
+    receita_diaria = None
+    
+    print("\n💾 Salvando dados processados...")
+    try:
+        for bloco in blocos:
+            # Receita por dia acumulada entre os blocos
+            receita_bloco = bloco.groupby(bloco['data_venda'].dt.normalize())['valor_final'].sum()
+            receita_diaria = receita_bloco if receita_diaria is None else receita_diaria.add(receita_bloco, fill_value=0)
+            
+            # from_pandas descartaria em silêncio as colunas fora do schema
+            if list(bloco.columns) != ESQUEMA_PARQUET.names:
+                faltando = sorted(set(ESQUEMA_PARQUET.names) - set(bloco.columns))
+                sobrando = sorted(set(bloco.columns) - set(ESQUEMA_PARQUET.names))
+                detalhe = f"faltando {faltando}, fora do schema {sobrando}" if faltando or sobrando else "ordem diferente"
+                raise ValueError(f"Colunas do bloco diferem de ESQUEMA_PARQUET: {detalhe}")
+            
+            bloco = bloco.astype({coluna: 'category' for coluna in COLUNAS_CATEGORICAS})
+            tabela = pa.Table.from_pandas(bloco, schema=ESQUEMA_PARQUET, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(OUTPUT_PATH, tabela.schema, compression='zstd')
+                amostra = bloco[['id_venda', 'data_venda', 'cliente_nome', 'produto', 'valor_final',
+                                 'regiao', 'status', 'segmento_cliente']].head(10)
+            writer.write_table(tabela)
+    finally:
+        if writer is not None:
+            writer.close()
+    
     print(f"✅ Arquivo salvo em: {OUTPUT_PATH}")
     
+    if receita_diaria is not None:
+        salvar_receita_diaria(receita_diaria)
+    
     # Exibir amostra
     print(f"\n📋 Amostra dos dados processados:")
-    print(df[['id_venda', 'data_venda', 'cliente_nome', 'produto', 'valor_final', 
-              'regiao', 'status', 'segmento_cliente']].head(10))
+    print(amostra)
+
+def salvar_receita_diaria(receita_diaria):
+    """Salva a receita diária de todo o período (sem filtros) em um Parquet à parte."""
+    receita = receita_diaria.sort_index().resample('D').sum().rename_axis('data_venda').to_frame('receita')
+    receita.to_parquet(DAILY_PATH, engine='pyarrow', compression='zstd')
+    print(f"✅ Receita diária salva em: {DAILY_PATH}")
 
 def main():
     """Executa o pipeline completo."""
@@ -132,12 +288,11 @@ def main():
     print("🚀 PIPELINE ETL - ANÁLISE DE VENDAS")
     print("=" * 60)
     
-    # Executar etapas
-    df = carregar_dados()
-    df = limpar_dados(df)
-    df = transformar_dados(df)
+    # Executar etapas (o CSV é lido em blocos; só as colunas dos KPIs voltam à memória)
+    valor_por_cliente, manter = calcular_valor_por_cliente()
+    salvar_dados(processar_blocos(valor_por_cliente, manter))
+    df = pd.read_parquet(OUTPUT_PATH, engine='pyarrow', columns=COLUNAS_KPIS)
     kpis = calcular_kpis(df)
-    salvar_dados(df)
     
     print("\n" + "=" * 60)
     print("✅ Pipeline ETL concluído com sucesso!")
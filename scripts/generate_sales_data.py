@@ -4,20 +4,23 @@ Script para gerar dados realistas de vendas para análise.
 Cria um dataset com informações de clientes, produtos e transações.
 """
 
-import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
-import os
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import argparse
+from pathlib import Path
 
-# Configurações
+# Configurações (SEED alimenta o np.random.default_rng de cada bloco)
 SEED = 42
 NUM_RECORDS = 5000
-OUTPUT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vendas.csv')
-
-# Definir seed para reprodutibilidade
-np.random.seed(SEED)
-random.seed(SEED)
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+OUTPUT_PATH = DATA_DIR / 'vendas.csv'
+OUTPUT_PARQUET_PATH = DATA_DIR / 'vendas.parquet'
+BUFFER_ESCRITA = 1024 * 1024
 
 # Listas de dados realistas
 PRODUTOS = {
@@ -38,103 +41,157 @@ PRODUTOS = {
     'Processador Intel i9': 2499,
 }
 
+# Nomes e preços dos produtos como arrays paralelos (indexados pelo mesmo sorteio)
+PROD_NOMES = np.array(list(PRODUTOS.keys()))
+PROD_PRECOS = np.array(list(PRODUTOS.values()), dtype=np.int32)
+PROD_PRECOS_CENTAVOS = PROD_PRECOS.astype(np.int64) * 100
+
+NOMES = ('João Silva', 'Maria Santos', 'Pedro Oliveira', 'Ana Costa', 'Carlos Ferreira',
+         'Juliana Rocha', 'Lucas Martins', 'Fernanda Lima', 'Roberto Alves', 'Patricia Gomes',
+         'Felipe Souza', 'Beatriz Ribeiro', 'Gustavo Pereira', 'Camila Nunes', 'Ricardo Dias')
+
 REGIOES = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul']
 CATEGORIAS = ['Eletrônicos', 'Periféricos', 'Componentes', 'Acessórios', 'Smartphones']
 FORMAS_PAGAMENTO = ['Cartão Crédito', 'Cartão Débito', 'PIX', 'Boleto', 'Crediário']
 STATUS = ['Concluída', 'Pendente', 'Cancelada', 'Devolvida']
+STATUS_PROBS = np.array([0.75, 0.15, 0.05, 0.05])
 
-def gerar_dados():
-    """Gera dados realistas de vendas."""
+# Descontos possíveis e probabilidades (mais vendas sem desconto)
+DESCONTOS = np.array([0, 5, 10, 15, 20], dtype=np.int8)
+DESCONTOS_PROBS = np.array([3, 1, 1, 1, 1]) / 7
+
+# Os arrays Arrow são montados direto dos buffers: pa.array importaria o pandas,
+# que só é necessário no modo --verbose
+def arrow_numerico(valores, tipo=None, validos=None):
+    """Envolve um array NumPy em um array Arrow sem cópia (validos marca os não nulos)."""
+    valores = np.ascontiguousarray(valores)
+    tipo = tipo or pa.from_numpy_dtype(valores.dtype)
+    validade = None if validos is None else pa.py_buffer(np.packbits(validos, bitorder='little'))
+    return pa.Array.from_buffers(tipo, len(valores), [validade, pa.py_buffer(valores)])
+
+def arrow_textos(textos):
+    """Monta um array Arrow de strings a partir de uma lista de textos."""
+    dados = [texto.encode() for texto in textos]
+    offsets = np.concatenate([[0], np.cumsum([len(d) for d in dados])]).astype(np.int32)
+    return pa.Array.from_buffers(pa.string(), len(dados), [None, pa.py_buffer(offsets), pa.py_buffer(b''.join(dados))])
+
+def categorizar(codigos, categorias):
+    """Monta uma coluna de dicionário do Arrow (equivalente a category) a partir dos códigos."""
+    return pa.DictionaryArray.from_arrays(arrow_numerico(codigos.astype(np.int32)), arrow_textos(categorias))
+
+def gerar_bloco(inicio, fim, semente):
+    """Gera as vendas de índices [inicio, fim) como uma tabela Arrow."""
     
+    rng = np.random.default_rng(semente)
     data_inicio = datetime(2023, 1, 1)
     data_fim = datetime(2025, 2, 25)
+    n = fim - inicio
+    
+    # ID e data (date32 = dias desde 1970-01-01: AAAA-MM-DD no CSV)
+    numeros = arrow_numerico(np.arange(inicio + 1, fim + 1)).cast(pa.string())
+    prefixo_venda, prefixo_cliente, separador = arrow_textos(['VND', 'CLI', ''])
+    id_venda = pc.binary_join_element_wise(prefixo_venda, pc.utf8_lpad(numeros, width=6, padding='0'), separador)
+    dias_aleatorios = rng.integers(0, (data_fim - data_inicio).days + 1, n)
+    data_venda = (np.datetime64(data_inicio, 'D') + dias_aleatorios.astype('timedelta64[D]')).astype(np.int32)
     
-    dados = {
-        'id_venda': [],
-        'data_venda': [],
-        'id_cliente': [],
-        'cliente_nome': [],
-        'produto': [],
-        'categoria': [],
-        'quantidade': [],
-        'preco_unitario': [],
-        'valor_total': [],
-        'desconto_percentual': [],
-        'valor_final': [],
-        'regiao': [],
-        'forma_pagamento': [],
-        'status': [],
-        'dias_para_entrega': [],
-    }
+    # Cliente
+    id_cliente = pc.binary_join_element_wise(prefixo_cliente, arrow_numerico(rng.integers(1000, 10000, n)).cast(pa.string()), separador)
+    cliente_nome = categorizar(rng.integers(0, len(NOMES), n), NOMES)
     
-    for i in range(NUM_RECORDS):
-        # ID e data
-        id_venda = f'VND{i+1:06d}'
-        dias_aleatorios = random.randint(0, (data_fim - data_inicio).days)
-        data_venda = data_inicio + timedelta(days=dias_aleatorios)
-        
-        # Cliente
-        id_cliente = f'CLI{random.randint(1000, 9999)}'
-        nomes = ['João Silva', 'Maria Santos', 'Pedro Oliveira', 'Ana Costa', 'Carlos Ferreira',
-                 'Juliana Rocha', 'Lucas Martins', 'Fernanda Lima', 'Roberto Alves', 'Patricia Gomes',
-                 'Felipe Souza', 'Beatriz Ribeiro', 'Gustavo Pereira', 'Camila Nunes', 'Ricardo Dias']
-        cliente_nome = random.choice(nomes)
-        
-        # Produto
-        produto = random.choice(list(PRODUTOS.keys()))
-        preco_unitario = PRODUTOS[produto]
-        categoria = random.choice(CATEGORIAS)
-        
-        # Quantidade e valores
-        quantidade = random.randint(1, 5)
-        valor_total = preco_unitario * quantidade
-        desconto_percentual = random.choice([0, 0, 0, 5, 10, 15, 20])  # Mais vendas sem desconto
-        valor_desconto = valor_total * (desconto_percentual / 100)
-        valor_final = valor_total - valor_desconto
-        
-        # Região e pagamento
-        regiao = random.choice(REGIOES)
-        forma_pagamento = random.choice(FORMAS_PAGAMENTO)
-        status = random.choices(STATUS, weights=[0.75, 0.15, 0.05, 0.05])[0]
-        
-        # Dias para entrega
-        dias_entrega = random.randint(1, 30) if status == 'Concluída' else None
-        
-        # Adicionar aos dados
-        dados['id_venda'].append(id_venda)
-        dados['data_venda'].append(data_venda)
-        dados['id_cliente'].append(id_cliente)
-        dados['cliente_nome'].append(cliente_nome)
-        dados['produto'].append(produto)
-        dados['categoria'].append(categoria)
-        dados['quantidade'].append(quantidade)
-        dados['preco_unitario'].append(preco_unitario)
-        dados['valor_total'].append(valor_total)
-        dados['desconto_percentual'].append(desconto_percentual)
-        dados['valor_final'].append(valor_final)
-        dados['regiao'].append(regiao)
-        dados['forma_pagamento'].append(forma_pagamento)
-        dados['status'].append(status)
-        dados['dias_para_entrega'].append(dias_entrega)
+    # Produto (o mesmo índice garante preço coerente com o produto)
+    produto_idx = rng.integers(0, len(PROD_NOMES), n)
+    produto = categorizar(produto_idx, PROD_NOMES)
+    preco_unitario = PROD_PRECOS[produto_idx]
+    categoria = categorizar(rng.integers(0, len(CATEGORIAS), n), CATEGORIAS)
     
-    # Criar DataFrame
-    df = pd.DataFrame(dados)
+    # Quantidade e valores (em centavos inteiros; convertidos para reais só na saída)
+    quantidade = rng.integers(1, 6, n).astype(np.int8)
+    valor_total_centavos = PROD_PRECOS_CENTAVOS[produto_idx] * quantidade
+    desconto_percentual = rng.choice(DESCONTOS, size=n, p=DESCONTOS_PROBS)
+    valor_final_centavos = valor_total_centavos * (100 - desconto_percentual) // 100
+    
+    # Região e pagamento (colunas de baixa cardinalidade geradas direto como dicionário)
+    regiao = categorizar(rng.integers(0, len(REGIOES), n), REGIOES)
+    forma_pagamento = categorizar(rng.integers(0, len(FORMAS_PAGAMENTO), n), FORMAS_PAGAMENTO)
+    status_idx = rng.choice(len(STATUS), size=n, p=STATUS_PROBS)
+    status = categorizar(status_idx, STATUS)
+    
+    # Dias para entrega (apenas vendas concluídas): int16 com máscara de nulos, sem passar por float/NaN
+    concluida = status_idx == STATUS.index('Concluída')
+    dias_entrega = arrow_numerico(rng.integers(1, 31, n).astype(np.int16), validos=concluida)
+    
+    # Tabela Arrow montada direto dos arrays, sem DataFrame intermediário
+    return pa.table({
+        'id_venda': id_venda,
+        'data_venda': arrow_numerico(data_venda, pa.date32()),
+        'id_cliente': id_cliente,
+        'cliente_nome': cliente_nome,
+        'produto': produto,
+        'categoria': categoria,
+        'quantidade': arrow_numerico(quantidade),
+        'preco_unitario': arrow_numerico(preco_unitario),
+        'valor_total': arrow_numerico(valor_total_centavos // 100),
+        'desconto_percentual': arrow_numerico(desconto_percentual),
+        'valor_final': arrow_numerico(valor_final_centavos / 100),
+        'regiao': regiao,
+        'forma_pagamento': forma_pagamento,
+        'status': status,
+        'dias_para_entrega': dias_entrega,
+    })
+
+def gerar_dados(num_registros=NUM_RECORDS, workers=1, verbose=False):
+    """Gera dados realistas de vendas."""
+    
+    # Intervalos contíguos de linhas, um por worker (cada um com sua própria semente)
+    limites = np.linspace(0, num_registros, workers + 1).astype(int)
+    intervalos = [(limites[i], limites[i + 1], SEED + i) for i in range(workers)]
+    
+    if workers == 1:
+        tabela = gerar_bloco(*intervalos[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            blocos = list(executor.map(gerar_bloco, *zip(*intervalos)))
+        tabela = pa.concat_tables(blocos)
     
     # Garantir que o diretório existe
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     
-    # Salvar CSV
-    df.to_csv(OUTPUT_PATH, index=False, encoding='utf-8')
+    # Salvar CSV pelo escritor do Arrow (C++, multithread).
+    # O buffer de 1 MiB agrupa as escritas em disco.
+    with open(OUTPUT_PATH, 'wb', buffering=BUFFER_ESCRITA) as arquivo:
+        pacsv.write_csv(tabela, arquivo, write_options=pacsv.WriteOptions(include_header=True))
+    
+    # Salvar também em Parquet (binário, tipado e bem menor que o CSV)
+    pq.write_table(tabela, OUTPUT_PARQUET_PATH, compression='zstd')
     
     print(f"✅ Dataset gerado com sucesso!")
-    print(f"📊 Total de registros: {len(df)}")
+    print(f"📊 Total de registros: {tabela.num_rows}")
     print(f"💾 Arquivo salvo em: {OUTPUT_PATH}")
-    print(f"\nPrimeiras linhas:")
-    print(df.head())
-    print(f"\nInformações do dataset:")
-    print(df.info())
-    print(f"\nEstatísticas básicas:")
-    print(df.describe())
+    print(f"💾 Arquivo salvo em: {OUTPUT_PARQUET_PATH}")
+    
+    # Resumo do dataset só sob demanda (describe/info percorrem todas as colunas)
+    # (pandas é importado só aqui: o caminho padrão usa apenas NumPy e Arrow)
+    if verbose:
+        import pandas as pd
+        df = tabela.to_pandas(types_mapper={pa.int16(): pd.Int16Dtype()}.get, date_as_object=False)
+        print(f"\nPrimeiras linhas:")
+        print(df.head())
+        print(f"\nInformações do dataset:")
+        print(df.info())
+        print(f"\nEstatísticas básicas:")
+        print(df.describe())
 
 if __name__ == '__main__':
-    gerar_dados()
+    parser = argparse.ArgumentParser(description='Gera dados realistas de vendas.')
+    parser.add_argument('--rows', type=int, default=NUM_RECORDS,
+                        help=f'número de registros a gerar (padrão: {NUM_RECORDS})')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos usados na geração (padrão: 1)')
+    parser.add_argument('--verbose', action='store_true',
+                        help='exibe amostra, tipos e estatísticas do dataset gerado')
+    args = parser.parse_args()
+    if args.rows < 0:
+        parser.error('--rows deve ser maior ou igual a 0')
+    if args.workers < 1:
+        parser.error('--workers deve ser maior ou igual a 1')
+    gerar_dados(args.rows, args.workers, verbose=args.verbose)